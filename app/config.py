@@ -1,3 +1,5 @@
+from functools import lru_cache
+from typing import Literal
 from pydantic.v1 import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,8 +9,25 @@ class Settings(BaseSettings):
     sk: str = ""
     bucket_name: str = ""
     region_name: str = ""
+    max_pool_connections: int = 50
+    max_retry_attempts: int = 5
+    multipart_threshold: int = 16 * 1024 * 1024
+    multipart_chunksize: int = 16 * 1024 * 1024
+    transfer_max_concurrency: int = 16
+    transfer_io_chunksize: int = 1024 * 1024
+    enable_metadata_cache: bool = True
+    metadata_cache_ttl: int = 300
+    metadata_cache_max: int = 10_000
+    max_concurrent_uploads: int = 10
+    http_write_buffer_bytes: int = 1024 * 1024
+    checksum_algorithm: (
+        Literal["CRC32", "CRC32C", "SHA1", "SHA256", "CRC64NVME"] | None
+    ) = None
+    list_include_readable_size: bool = False
     # class Config:
     #     env_file = ".env"
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,6 @@
+from fastapi import Request
+from services.s3_service import S3Service
+
+
+def get_s3_service(request: Request) -> S3Service:
+    return request.app.state.s3_service
@@ -1,17 +1,28 @@
-from fastapi import FastAPI
-from config import Settings
+import threading
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, Response
+from config import Settings, get_settings
 from dotenv import load_dotenv
-from middleware import get_request_duration
+from middleware import PathExcludedGZipMiddleware, get_request_duration
 from routers import router as api_router
+from routers.endpoints import HEALTH_RESPONSE
+from services.s3_service import (
+    S3Service,
+    close_s3_clients,
+    set_http_write_buffer,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
 load_dotenv(Settings.Config.env_file)
+settings = get_settings()
 
 app = FastAPI(
-    title="Porter",
+    title=settings.app_name,
+    version=settings.app_version,
     description="...",
     docs_url="/api/docs",
     openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
     swagger_ui_parameters={
         "syntaxHighlighting": {
             "theme": "obsidian"
@@ -19,6 +30,41 @@ app = FastAPI(
     }
 )
 app.include_router(api_router)
+
+
+async def health(request: Request):
+    return Response(HEALTH_RESPONSE, media_type="application/json")
+
+
+app.add_route("/health", health, include_in_schema=False)
+
+
+@app.on_event("startup")
+def create_s3_service():
+    set_http_write_buffer(settings.http_write_buffer_bytes)
+    app.state.s3_service = S3Service.from_settings(settings)
+    # Warm up off the startup path: an unreachable endpoint would otherwise
+    # hold back readiness for the full connect timeout on every retry.
+    threading.Thread(
+        target=app.state.s3_service.warmup, name="s3-warmup", daemon=True
+    ).start()
+
+
+@app.on_event("shutdown")
+def close_s3_service():
+    close_s3_clients()
+
+
+# GZip is registered first so it runs inside the timing middleware and sees
+# the endpoint's real response; behind BaseHTTPMiddleware every body arrives
+# as a stream and minimum_size would never apply.
+app.add_middleware(
+    PathExcludedGZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_paths=("/endpoint/download",),
+)
+
 app.middleware('http')(get_request_duration)
 
 app.add_middleware(
@@ -1,5 +1,7 @@
+from .compression import PathExcludedGZipMiddleware
 from .timing import get_request_duration
 
 __all__ = [
+    "PathExcludedGZipMiddleware",
     "get_request_duration"
-]
\ No newline at end of file
+]
@@ -0,0 +1,21 @@
+from fastapi.middleware.gzip import GZipMiddleware
+
+
+class PathExcludedGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves selected path prefixes untouched.
+
+    Raw object downloads must keep their byte ranges and Content-Length
+    intact, so they are passed through without compression.
+    """
+
+    def __init__(self, app, exclude_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(
+            self.exclude_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
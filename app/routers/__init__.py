@@ -1,9 +1,14 @@
+import orjson
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from .endpoints import router as endpoint_router
 
 router = APIRouter()
 
+_ROOT_RESPONSE = orjson.dumps({
+    "response": "running"
+})
+
 router.include_router(
     endpoint_router,
     tags=["endpoint"],
@@ -11,7 +16,5 @@ router.include_router(
 )
 
 @router.get("/", status_code=status.HTTP_200_OK)
-def root():
-    return JSONResponse({
-        "response": "running"
-    })
\ No newline at end of file
+async def root():
+    return Response(_ROOT_RESPONSE, media_type="application/json")
\ No newline at end of file
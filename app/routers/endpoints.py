@@ -1,32 +1,280 @@
-from config import settings
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import orjson
+from botocore.exceptions import BotoCoreError, ClientError
+from dependencies import get_s3_service
+from fastapi import (
+    APIRouter,
+    Depends,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status
+)
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from schemas import CopyRequest
 from services.s3_service import S3Service
+from utils.s3_helpers import prepare_key
 
 router = APIRouter()
 
+_HELLO_RESPONSE = orjson.dumps({
+    "response": "Hello, world cicd github-0527!"
+})
+HEALTH_RESPONSE = orjson.dumps({"status": "ok"})
+
+
+_S3_ERROR_RESPONSES = {
+    "NoSuchKey": (status.HTTP_404_NOT_FOUND, "File not found"),
+    "404": (status.HTTP_404_NOT_FOUND, "File not found"),
+    "NoSuchBucket": (status.HTTP_404_NOT_FOUND, "Bucket not found"),
+    "AccessDenied": (status.HTTP_403_FORBIDDEN, "Access denied"),
+    "403": (status.HTTP_403_FORBIDDEN, "Access denied"),
+    "InvalidRange": (
+        status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        "Requested range not satisfiable"
+    ),
+    "SlowDown": (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Storage is throttling requests"
+    ),
+}
+
+
+def _s3_http_exception(error, detail):
+    if isinstance(error, ClientError):
+        response = _S3_ERROR_RESPONSES.get(error.response["Error"]["Code"])
+        if response is not None:
+            status_code, error_detail = response
+            return HTTPException(status_code=status_code, detail=error_detail)
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail=detail
+    )
+
+
+def _prepare_object_name(object_name):
+    try:
+        return prepare_key(object_name)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _parse_metadata(metadata):
+    if metadata is None:
+        return None
+    try:
+        file_metadata = orjson.loads(metadata)
+    except orjson.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="metadata must be a JSON object"
+        )
+    if not isinstance(file_metadata, dict) or not all(
+        isinstance(value, str) for value in file_metadata.values()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="metadata must be a JSON object of strings"
+        )
+    return file_metadata
+
+
+def _parse_http_date(value):
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified_response(error, if_none_match):
+    # A 304 carries the validators a 200 would have (RFC 9110 15.4.5). S3
+    # sends them on its own 304; otherwise the single tag that matched
+    # If-None-Match is the current ETag.
+    s3_headers = error.response.get("ResponseMetadata", {}).get(
+        "HTTPHeaders", {}
+    )
+    headers = {"Accept-Ranges": "bytes"}
+    etag = s3_headers.get("etag")
+    if etag is None and if_none_match and "," not in if_none_match:
+        etag = if_none_match.strip()
+    if etag and etag != "*":
+        headers["ETag"] = etag
+    if "last-modified" in s3_headers:
+        headers["Last-Modified"] = s3_headers["last-modified"]
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
 @router.get("/hello")
-def hello():
-    return JSONResponse({
-        "response": "Hello, world cicd github-0527!"
+async def hello():
+    return Response(_HELLO_RESPONSE, media_type="application/json")
+
+# Hot endpoints return ORJSONResponse directly so FastAPI skips the
+# jsonable_encoder pass over payloads we already know are JSON-safe.
+@router.post("/upload")
+async def upload_fileobj(
+    file: UploadFile,
+    object_name: str | None = Form(None),
+    metadata: str | None = Form(None),
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    object_name = _prepare_object_name(
+        object_name or f"uploads/{file.filename}"
+    )
+    file_metadata = _parse_metadata(metadata)
+    uploaded = await s3_service.upload_fileobj_async(
+        file.file,
+        object_name,
+        content_type=file.content_type,
+        metadata=file_metadata
+    )
+    if not uploaded:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Failed to upload file"
+        )
+    return ORJSONResponse({
+        "response": "File uploaded successfully!",
+        "object_name": object_name
     })
 
-@router.get("/upload")
-def upload_file():
-    s3_service = S3Service(
-        ak=settings.ak,
-        sk=settings.sk,
-        bucket_name=settings.bucket_name,
-        region_name=settings.region_name
+@router.post("/upload-stream")
+async def upload_stream(
+    request: Request,
+    object_name: str,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    object_name = _prepare_object_name(object_name)
+    uploaded = await s3_service.upload_stream(
+        request.stream(),
+        object_name,
+        content_type=request.headers.get("content-type")
     )
-    file_path = "./file.txt"
-    s3_service.upload_file(file_path, object_name="uploads/file.txt")
-    return JSONResponse({
-        "response": "File uploaded successfully!"
+    if not uploaded:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Failed to upload file"
+        )
+    return ORJSONResponse({
+        "response": "File uploaded successfully!",
+        "object_name": object_name
     })
 
+@router.get("/download")
+def download_file(
+    request: Request,
+    object_name: str,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    object_name = _prepare_object_name(object_name)
+    try:
+        s3_object = s3_service.download_stream(
+            object_name,
+            byte_range=request.headers.get("range"),
+            if_none_match=request.headers.get("if-none-match"),
+            if_modified_since=_parse_http_date(
+                request.headers.get("if-modified-since")
+            )
+        )
+    except (BotoCoreError, ClientError) as e:
+        if (
+            isinstance(e, ClientError)
+            and e.response["Error"]["Code"] in ("304", "NotModified")
+        ):
+            return _not_modified_response(
+                e, request.headers.get("if-none-match")
+            )
+        raise _s3_http_exception(e, "Failed to download file")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(s3_object["ContentLength"])
+    }
+    if "ETag" in s3_object:
+        headers["ETag"] = s3_object["ETag"]
+    if "LastModified" in s3_object:
+        headers["Last-Modified"] = format_datetime(
+            s3_object["LastModified"].astimezone(timezone.utc), usegmt=True
+        )
+    if "ContentRange" in s3_object:
+        headers["Content-Range"] = s3_object["ContentRange"]
+    return StreamingResponse(
+        s3_object["Body"].iter_chunks(chunk_size=1024 * 1024),
+        status_code=(
+            status.HTTP_206_PARTIAL_CONTENT
+            if "ContentRange" in s3_object else status.HTTP_200_OK
+        ),
+        media_type=s3_object.get("ContentType"),
+        headers=headers
+    )
+
+
+@router.get("/info")
+def get_file_info(
+    object_name: str,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    object_name = _prepare_object_name(object_name)
+    try:
+        return s3_service.get_file_info(object_name)
+    except (BotoCoreError, ClientError) as e:
+        raise _s3_http_exception(e, "Failed to get file info")
+
+
+@router.get("/list")
+def list_files(
+    prefix: str = "",
+    max_keys: int = Query(1000, gt=0, le=1000),
+    continuation_token: str | None = None,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    try:
+        page = s3_service.list_files(prefix, max_keys, continuation_token)
+    except (BotoCoreError, ClientError) as e:
+        raise _s3_http_exception(e, "Failed to list files")
+    return ORJSONResponse(page)
+
+
+@router.get("/exists")
+def file_exists(
+    object_name: str,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    object_name = _prepare_object_name(object_name)
+    try:
+        exists = s3_service.file_exists(object_name)
+    except (BotoCoreError, ClientError) as e:
+        raise _s3_http_exception(e, "Failed to check file")
+    return {
+        "object_name": object_name,
+        "exists": exists
+    }
+
+
+@router.post("/copy")
+def copy_file(
+    payload: CopyRequest,
+    s3_service: S3Service = Depends(get_s3_service)
+):
+    source_object_name = _prepare_object_name(payload.source_object_name)
+    dest_object_name = _prepare_object_name(payload.dest_object_name)
+    try:
+        s3_service.copy_file(source_object_name, dest_object_name)
+    except (BotoCoreError, ClientError) as e:
+        raise _s3_http_exception(e, "Failed to copy file")
+    return {
+        "response": "File copied successfully!",
+        "object_name": dest_object_name
+    }
 
 
 @router.get("/health")
-def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+async def health_check():
+    return Response(HEALTH_RESPONSE, media_type="application/json")
\ No newline at end of file
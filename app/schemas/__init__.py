@@ -0,0 +1,5 @@
+from .s3 import CopyRequest
+
+__all__ = [
+    "CopyRequest"
+]
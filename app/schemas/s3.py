@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class CopyRequest(BaseModel):
+    source_object_name: str = Field(..., min_length=1)
+    dest_object_name: str = Field(..., min_length=1)
@@ -1,26 +1,686 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from http.client import HTTPConnection
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore import httpsession
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
 from utils.logger import logger
+from utils.s3_helpers import format_file_size
+
+DELETE_BATCH_SIZE = 1000
+# DeleteObjects batches sent concurrently by a single delete_files call.
+DELETE_BATCH_CONCURRENCY = 8
+# Multipart part sizes are rounded up to this boundary.
+PART_ALIGNMENT = 16 * 1024 * 1024
+# Parts of a single upload_stream call sent concurrently.
+STREAM_UPLOAD_CONCURRENCY = 4
+# Connections kept on top of the transfer fan-out for list/head/get calls.
+POOL_HEADROOM = 8
+
+
+def set_http_write_buffer(size):
+    """Raise the block size used when sending request bodies.
+
+    With urllib3 2.x botocore passes its own ``BUFFER_SIZE`` (128 KiB) to the
+    pool manager; with urllib3 1.x the connection falls back to the 8 KiB
+    default hard-coded in ``http.client``. Both are process-wide and read
+    when a client is created, so call this once at startup, before the first
+    S3Service is built.
+    """
+    if httpsession.BUFFER_SIZE is not None:
+        httpsession.BUFFER_SIZE = size
+    else:
+        defaults = HTTPConnection.__init__.__defaults__
+        HTTPConnection.__init__.__defaults__ = defaults[:-1] + (size,)
+
+
+@lru_cache(maxsize=None)
+def _get_session(region_name):
+    """Return a boto3 session shared by every S3Service for a region.
+
+    Creating a session resolves credentials and loads botocore's endpoint
+    and service data; reusing it keeps that state (and the loaded S3 model)
+    warm for subsequent clients.
+    """
+    return boto3.session.Session(region_name=region_name)
+
+
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def _get_s3_client(region_name, max_pool_connections, max_retry_attempts):
+    """Return an S3 client shared by every S3Service with the same settings.
+
+    botocore clients are thread-safe, so sharing one also shares its
+    connection pool and the TLS sessions already established in it.
+    Credentials come from the session's default provider chain; the
+    ``ak``/``sk`` an S3Service is given are not used, so they are not part
+    of the key.
+    """
+    key = (region_name, max_pool_connections, max_retry_attempts)
+    with _s3_clients_lock:
+        client = _s3_clients.get(key)
+        if client is None:
+            boto_config = Config(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+                # total_max_attempts counts the first call; max_attempts
+                # would not.
+                retries={
+                    "total_max_attempts": max_retry_attempts,
+                    "mode": "adaptive",
+                },
+            )
+            client = _get_session(region_name).client(
+                "s3", region_name=region_name, config=boto_config
+            )
+            _s3_clients[key] = client
+        return client
+
+
+def close_s3_clients():
+    """Close every shared S3 client; call once at application shutdown."""
+    with _s3_clients_lock:
+        clients = list(_s3_clients.values())
+        _s3_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def _required_pool_size(max_concurrent_uploads, transfer_max_concurrency):
+    """Connections needed so concurrent transfers never wait on the pool.
+
+    Every managed transfer runs up to ``transfer_max_concurrency`` requests
+    (``STREAM_UPLOAD_CONCURRENCY`` for upload_stream) and up to
+    ``max_concurrent_uploads`` of them run at once, next to one
+    delete_files fan-out and the regular single-request calls.
+    """
+    per_upload = max(transfer_max_concurrency, STREAM_UPLOAD_CONCURRENCY)
+    return (
+        max_concurrent_uploads * per_upload
+        + DELETE_BATCH_CONCURRENCY
+        + POOL_HEADROOM
+    )
+
+
+def _align_part_size(chunk_size):
+    aligned = max(
+        PART_ALIGNMENT,
+        -(-chunk_size // PART_ALIGNMENT) * PART_ALIGNMENT,
+    )
+    if aligned != chunk_size:
+        logger.warning(
+            "multipart_chunksize %d rounded up to %d "
+            "to align with %d byte boundaries",
+            chunk_size, aligned, PART_ALIGNMENT,
+        )
+    return aligned
+
 
 class S3Service:
-    def __init__(self, ak, sk, bucket_name, region_name=None):
-        session = boto3.session.Session()
+    def __init__(
+        self,
+        ak,
+        sk,
+        bucket_name,
+        region_name=None,
+        *,
+        max_pool_connections,
+        max_retry_attempts,
+        multipart_threshold,
+        multipart_chunksize,
+        transfer_max_concurrency,
+        transfer_io_chunksize,
+        enable_metadata_cache,
+        metadata_cache_ttl,
+        metadata_cache_max,
+        max_concurrent_uploads,
+        checksum_algorithm,
+        list_include_readable_size,
+    ):
         # self.s3 = boto3.client(
         #     "s3",
         #     aws_access_key_id=ak,
         #     aws_secret_access_key=sk,
         #     region_name=region_name,
         # )
-        self.s3 = session.client("s3", region_name=region_name)
+        self.s3 = _get_s3_client(
+            region_name or None,
+            max(
+                max_pool_connections,
+                _required_pool_size(
+                    max_concurrent_uploads, transfer_max_concurrency
+                ),
+            ),
+            max_retry_attempts,
+        )
         self.bucket_name = bucket_name
+        self.multipart_chunksize = _align_part_size(multipart_chunksize)
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.checksum_algorithm = checksum_algorithm
+        self.list_include_readable_size = list_include_readable_size
+        self._upload_semaphore = threading.BoundedSemaphore(
+            max_concurrent_uploads
+        )
+        # Shared by the async upload paths; waiting happens on the event loop.
+        self._upload_slots = asyncio.Semaphore(max_concurrent_uploads)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=transfer_max_concurrency,
+            io_chunksize=transfer_io_chunksize,
+            use_threads=True,
+        )
+        self._metadata_cache = (
+            TTLCache(maxsize=metadata_cache_max, ttl=metadata_cache_ttl)
+            if enable_metadata_cache else None
+        )
+        self._metadata_cache_lock = threading.Lock()
+        self._metadata_inflight = {}
+        # HEAD/GET loads per key that may still cache their result. An
+        # invalidation drops the key's entry, so a load that started before
+        # it never writes back; entries only live while loads are running.
+        self._metadata_loads = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a service from ``Settings``, the single source of defaults."""
+        return cls(
+            ak=settings.ak,
+            sk=settings.sk,
+            bucket_name=settings.bucket_name,
+            region_name=settings.region_name,
+            max_pool_connections=settings.max_pool_connections,
+            max_retry_attempts=settings.max_retry_attempts,
+            multipart_threshold=settings.multipart_threshold,
+            multipart_chunksize=settings.multipart_chunksize,
+            transfer_max_concurrency=settings.transfer_max_concurrency,
+            transfer_io_chunksize=settings.transfer_io_chunksize,
+            enable_metadata_cache=settings.enable_metadata_cache,
+            metadata_cache_ttl=settings.metadata_cache_ttl,
+            metadata_cache_max=settings.metadata_cache_max,
+            max_concurrent_uploads=settings.max_concurrent_uploads,
+            checksum_algorithm=settings.checksum_algorithm,
+            list_include_readable_size=settings.list_include_readable_size,
+        )
+
+    def warmup(self):
+        """Open a pooled connection to the bucket ahead of the first request.
+
+        The TLS handshake and endpoint resolution are paid here instead of by
+        whichever request happens to arrive first. The call goes through the
+        regular retrying client, so run it off the startup path.
+        """
+        try:
+            self.s3.head_bucket(Bucket=self.bucket_name)
+            return True
+        except (BotoCoreError, ClientError) as e:
+            logger.warning(
+                "Failed to warm up bucket %s: %s", self.bucket_name, e
+            )
+            return False
 
     def upload_file(self, file_path, object_name=None):
         if object_name is None:
             object_name = file_path
         try:
-            self.s3.upload_file(file_path, self.bucket_name, object_name)
-            logger.info(f"File {file_path} uploaded to {self.bucket_name}/{object_name}")
+            with self._upload_semaphore:
+                self.s3.upload_file(
+                    file_path,
+                    self.bucket_name,
+                    object_name,
+                    ExtraArgs=self._checksum_args() or None,
+                    Config=self.transfer_config,
+                )
+            self._invalidate_metadata(object_name)
+            logger.info(
+                "File %s uploaded to %s/%s",
+                file_path, self.bucket_name, object_name,
+            )
+            return True
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Failed to upload %s: %s", file_path, e)
+            return False
+
+    def upload_fileobj(
+        self, fileobj, object_name, content_type=None, metadata=None
+    ):
+        with self._upload_semaphore:
+            return self._upload_fileobj(
+                fileobj, object_name, content_type, metadata
+            )
+
+    async def upload_fileobj_async(
+        self, fileobj, object_name, content_type=None, metadata=None
+    ):
+        """Run ``upload_fileobj`` in the threadpool once an upload slot frees.
+
+        Queued uploads wait on the event loop rather than inside a worker
+        thread, so a burst of uploads cannot starve other sync endpoints of
+        AnyIO's threadpool.
+        """
+        async with self._upload_slots:
+            return await run_in_threadpool(
+                self._upload_fileobj,
+                fileobj,
+                object_name,
+                content_type,
+                metadata,
+            )
+
+    def _upload_fileobj(self, fileobj, object_name, content_type, metadata):
+        extra_args = self._checksum_args()
+        if content_type:
+            extra_args["ContentType"] = content_type
+        if metadata:
+            extra_args["Metadata"] = metadata
+        try:
+            self.s3.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                object_name,
+                ExtraArgs=extra_args or None,
+                Config=self.transfer_config,
+            )
+            self._invalidate_metadata(object_name)
+            logger.info(
+                "Stream uploaded to %s/%s", self.bucket_name, object_name
+            )
+            return True
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Failed to upload stream to %s: %s", object_name, e)
+            return False
+
+    def get_file_info(self, object_name):
+        """Return object metadata, served from the TTL cache when enabled.
+
+        Concurrent misses for the same key share a single ``head_object``
+        call. Errors (including 404) are propagated to every waiter.
+        """
+        if self._metadata_cache is None:
+            return self._head_file_info(object_name)
+
+        with self._metadata_cache_lock:
+            info = self._metadata_cache.get(object_name)
+            if info is not None:
+                return info
+            future = self._metadata_inflight.get(object_name)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._metadata_inflight[object_name] = future
+                self._begin_metadata_load(object_name, future)
+        if not is_leader:
+            return future.result()
+
+        try:
+            info = self._head_file_info(object_name)
+        except BaseException as e:
+            with self._metadata_cache_lock:
+                self._end_metadata_load(object_name, future)
+                self._finish_inflight(object_name, future)
+            future.set_exception(e)
+            raise
+        with self._metadata_cache_lock:
+            self._end_metadata_load(object_name, future, info)
+            self._finish_inflight(object_name, future)
+        future.set_result(info)
+        return info
+
+    def _finish_inflight(self, object_name, future):
+        # An invalidation may already have replaced this HEAD with a newer
+        # one; only remove the entry if it is still ours.
+        if self._metadata_inflight.get(object_name) is future:
+            del self._metadata_inflight[object_name]
+
+    def _begin_metadata_load(self, object_name, load):
+        """Must be called with ``_metadata_cache_lock`` held."""
+        self._metadata_loads.setdefault(object_name, set()).add(load)
+
+    def _end_metadata_load(self, object_name, load, info=None):
+        """Cache ``info`` unless the key was invalidated since ``load`` began.
+
+        Must be called with ``_metadata_cache_lock`` held.
+        """
+        loads = self._metadata_loads.get(object_name)
+        if loads is None or load not in loads:
+            return
+        loads.discard(load)
+        if not loads:
+            del self._metadata_loads[object_name]
+        if info is not None:
+            self._metadata_cache[object_name] = info
+
+    def _head_file_info(self, object_name):
+        response = self.s3.head_object(Bucket=self.bucket_name, Key=object_name)
+        return self._file_info_from_response(object_name, response)
+
+    @staticmethod
+    def _file_info_from_response(object_name, response):
+        return {
+            "object_name": object_name,
+            "size": response["ContentLength"],
+            "content_type": response.get("ContentType"),
+            "etag": response.get("ETag", "").strip('"'),
+            "last_modified": response["LastModified"].isoformat(),
+            "metadata": response.get("Metadata", {}),
+        }
+
+    def file_exists(self, object_name):
+        try:
+            self.get_file_info(object_name)
             return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return False
+            raise
+
+    def list_files(self, prefix="", max_keys=1000, continuation_token=None):
+        """Return one page of objects under ``prefix``."""
+        params = {
+            "Bucket": self.bucket_name,
+            "Prefix": prefix,
+            "MaxKeys": max_keys,
+        }
+        if continuation_token:
+            params["ContinuationToken"] = continuation_token
+        response = self.s3.list_objects_v2(**params)
+        files = [
+            {
+                "object_name": obj["Key"],
+                "size": obj["Size"],
+                "last_modified": obj["LastModified"].isoformat(),
+                "etag": obj["ETag"].strip('"'),
+                "storage_class": obj.get("StorageClass"),
+            }
+            for obj in response.get("Contents", ())
+        ]
+        # Human-readable sizes cost a float format per row; only build them
+        # when explicitly enabled.
+        if self.list_include_readable_size:
+            for item in files:
+                item["size_readable"] = format_file_size(item["size"])
+        return {
+            "files": files,
+            "next_continuation_token": response.get("NextContinuationToken"),
+        }
+
+    def copy_file(self, source_object_name, dest_object_name):
+        """Copy an object within the bucket on the S3 side.
+
+        boto3's managed copy issues a single CopyObject below
+        ``multipart_threshold`` and switches to concurrent UploadPartCopy
+        requests above it, which also lifts the 5 GB CopyObject limit.
+        Errors (including a missing source) are propagated to the caller.
+        """
+        self.s3.copy(
+            {"Bucket": self.bucket_name, "Key": source_object_name},
+            self.bucket_name,
+            dest_object_name,
+            Config=self.transfer_config,
+        )
+        self._invalidate_metadata(dest_object_name)
+        logger.info(
+            "Copied %s/%s to %s",
+            self.bucket_name, source_object_name, dest_object_name,
+        )
+
+    def delete_files(self, object_names):
+        """Delete objects with the bulk ``DeleteObjects`` API.
+
+        Keys are sent in batches of up to 1000 (the S3 limit per request);
+        multiple batches are issued concurrently.
+        """
+        batches = [
+            object_names[i:i + DELETE_BATCH_SIZE]
+            for i in range(0, len(object_names), DELETE_BATCH_SIZE)
+        ]
+        if len(batches) <= 1:
+            responses = [self._delete_batch(batch) for batch in batches]
+        else:
+            max_workers = min(
+                self.max_concurrent_uploads,
+                DELETE_BATCH_CONCURRENCY,
+                len(batches),
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = list(executor.map(self._delete_batch, batches))
+
+        results = {"deleted": [], "errors": []}
+        for response in responses:
+            results["deleted"].extend(response["deleted"])
+            results["errors"].extend(response["errors"])
+        return results
+
+    def _delete_batch(self, object_names):
+        try:
+            response = self.s3.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in object_names],
+                    "Quiet": False,
+                },
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.error(
+                "Failed to delete %d objects: %s", len(object_names), e
+            )
+            return {
+                "deleted": [],
+                "errors": [
+                    {"object_name": key, "code": "RequestFailed",
+                     "message": str(e)}
+                    for key in object_names
+                ],
+            }
+
+        deleted = [item["Key"] for item in response.get("Deleted", [])]
+        for key in deleted:
+            self._invalidate_metadata(key)
+        errors = [
+            {"object_name": item["Key"], "code": item.get("Code"),
+             "message": item.get("Message")}
+            for item in response.get("Errors", [])
+        ]
+        logger.info(
+            "Deleted %d objects from %s, %d failed",
+            len(deleted), self.bucket_name, len(errors),
+        )
+        return {"deleted": deleted, "errors": errors}
+
+    def _checksum_args(self):
+        """Let S3 verify uploads with a flexible checksum.
+
+        botocore computes the checksum in C while streaming the body, so
+        integrity is checked end to end without a second pass over the data.
+        CRC32C requires the ``awscrt`` extra (``boto3[crt]``).
+        """
+        if not self.checksum_algorithm:
+            return {}
+        return {"ChecksumAlgorithm": self.checksum_algorithm}
+
+    def _invalidate_metadata(self, object_name):
+        if self._metadata_cache is not None:
+            with self._metadata_cache_lock:
+                self._metadata_cache.pop(object_name, None)
+                # Later lookups must not join a HEAD issued before the change.
+                self._metadata_inflight.pop(object_name, None)
+                self._metadata_loads.pop(object_name, None)
+
+    def download_stream(
+        self,
+        object_name,
+        byte_range=None,
+        if_none_match=None,
+        if_modified_since=None,
+    ):
+        """Fetch an object with a single GET.
+
+        The returned response carries both the metadata (ContentLength,
+        ContentType, ...) and the streaming ``Body``, so callers do not need
+        a separate HEAD request. Range and conditional headers are forwarded
+        to S3 as-is. Errors (including 304/416) are propagated to the caller.
+        """
+        params = {"Bucket": self.bucket_name, "Key": object_name}
+        if byte_range:
+            params["Range"] = byte_range
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        if if_modified_since:
+            params["IfModifiedSince"] = if_modified_since
+        warm_cache = self._metadata_cache is not None and not byte_range
+        if not warm_cache:
+            return self.s3.get_object(**params)
+
+        load = object()
+        with self._metadata_cache_lock:
+            self._begin_metadata_load(object_name, load)
+        info = None
+        try:
+            response = self.s3.get_object(**params)
+            # A full GET carries the same headers as a HEAD, so use it to
+            # warm the metadata cache for get_file_info/file_exists calls.
+            info = self._file_info_from_response(object_name, response)
+        finally:
+            with self._metadata_cache_lock:
+                self._end_metadata_load(object_name, load, info)
+        return response
+
+    async def upload_stream(self, data_stream, object_name, content_type=None):
+        """Upload an async iterable of bytes as a multipart upload.
+
+        Incoming chunks are buffered only until a full part is available, so
+        memory stays bounded by a few parts (``STREAM_UPLOAD_CONCURRENCY``
+        in flight plus one queued) regardless of the total stream size.
+        """
+        async with self._upload_slots:
+            return await self._upload_stream(
+                data_stream, object_name, content_type
+            )
+
+    async def _upload_stream(self, data_stream, object_name, content_type):
+        extra_args = self._checksum_args()
+        if content_type:
+            extra_args["ContentType"] = content_type
+        try:
+            upload = await run_in_threadpool(
+                self.s3.create_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=object_name,
+                **extra_args,
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Failed to start upload to %s: %s", object_name, e)
+            return False
+
+        upload_id = upload["UploadId"]
+        parts = []
+        errors = []
+        # Reading the request and sending parts overlap: the producer below
+        # hands parts to a small pool of uploaders through a one-slot queue,
+        # so it blocks (and stops reading) whenever all uploaders are busy.
+        queue = asyncio.Queue(maxsize=1)
+        uploaders = [
+            asyncio.create_task(
+                self._part_uploader(object_name, upload_id, queue, parts, errors)
+            )
+            for _ in range(STREAM_UPLOAD_CONCURRENCY)
+        ]
+        try:
+            part_count = 0
+            buffer = bytearray()
+            async for chunk in data_stream:
+                buffer += chunk
+                while len(buffer) >= self.multipart_chunksize and not errors:
+                    # Hand the buffer itself to botocore (bytearray is a
+                    # supported Body) and copy only the overflow tail, rather
+                    # than slicing out and copying a full part.
+                    remainder = buffer[self.multipart_chunksize:]
+                    del buffer[self.multipart_chunksize:]
+                    part_count += 1
+                    await queue.put((part_count, buffer))
+                    buffer = remainder
+                if errors:
+                    break
+            if not errors and (buffer or not part_count):
+                part_count += 1
+                await queue.put((part_count, buffer))
+            for _ in uploaders:
+                await queue.put(None)
+            await asyncio.gather(*uploaders)
+            if errors:
+                raise errors[0]
+
+            parts.sort(key=lambda part: part["PartNumber"])
+            await run_in_threadpool(
+                self.s3.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=object_name,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            self._invalidate_metadata(object_name)
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Failed to upload stream to %s: %s", object_name, e)
+            await self._abort_multipart_upload(object_name, upload_id)
+            return False
+        except BaseException:
+            for uploader in uploaders:
+                uploader.cancel()
+            await self._abort_multipart_upload(object_name, upload_id)
+            raise
+
+        logger.info(
+            "Stream uploaded to %s/%s in %d parts",
+            self.bucket_name, object_name, len(parts),
+        )
+        return True
+
+    async def _part_uploader(self, object_name, upload_id, queue, parts, errors):
+        while (item := await queue.get()) is not None:
+            if errors:
+                # Keep draining so the producer never blocks on a full queue.
+                continue
+            part_number, body = item
+            try:
+                response = await run_in_threadpool(
+                    self.s3.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=object_name,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                    **self._checksum_args(),
+                )
+                part = {"ETag": response["ETag"], "PartNumber": part_number}
+                if self.checksum_algorithm:
+                    # S3-compatible backends may not echo the checksum back.
+                    checksum_key = f"Checksum{self.checksum_algorithm}"
+                    checksum = response.get(checksum_key)
+                    if checksum is not None:
+                        part[checksum_key] = checksum
+            except Exception as e:
+                # Every failure must be recorded: an uploader that dies
+                # silently stops draining the queue and the producer blocks
+                # on it forever.
+                errors.append(e)
+                continue
+            parts.append(part)
+
+    async def _abort_multipart_upload(self, object_name, upload_id):
+        try:
+            await run_in_threadpool(
+                self.s3.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=object_name,
+                UploadId=upload_id,
+            )
         except (BotoCoreError, ClientError) as e:
-            logger.error(f"Failed to upload {file_path}: {e}")
-            return False
\ No newline at end of file
+            logger.error("Failed to abort upload %s: %s", upload_id, e)
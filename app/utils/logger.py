@@ -1,5 +1,8 @@
+import atexit
 import logging
+import queue
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 
 class UTCFormatter(logging.Formatter):
@@ -12,6 +15,9 @@ class Logger:
     def __init__(self, log_file="service.log", log_level=logging.DEBUG):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
+        # getLogger returns the same instance; don't stack duplicate handlers.
+        if self.logger.handlers:
+            return
 
         console_handler = logging.StreamHandler()
         file_handler = logging.FileHandler(log_file)
@@ -24,8 +30,16 @@ class Logger:
         console_handler.setFormatter(formatter)
         file_handler.setFormatter(formatter)
 
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
+        # Callers only enqueue the record; console and file writes happen on
+        # the listener's thread so request handlers never block on log I/O.
+        log_queue = queue.SimpleQueue()
+        self.listener = QueueListener(
+            log_queue, console_handler, file_handler,
+            respect_handler_level=True,
+        )
+        self.logger.addHandler(QueueHandler(log_queue))
+        self.listener.start()
+        atexit.register(self.listener.stop)
 
 
     def get_logger(self):
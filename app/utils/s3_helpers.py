@@ -0,0 +1,26 @@
+import re
+
+MAX_KEY_BYTES = 1024
+_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# Drops control characters and turns backslashes into "/".
+_KEY_TRANSLATE_TABLE = dict.fromkeys((*range(32), 127))
+_KEY_TRANSLATE_TABLE[ord("\\")] = "/"
+_MULTISLASH_RE = re.compile(r"/{2,}")
+
+
+def prepare_key(key):
+    """Sanitize and validate an S3 object key."""
+    key = _MULTISLASH_RE.sub("/", key.translate(_KEY_TRANSLATE_TABLE))
+    key = key.lstrip("/")
+    if not key:
+        raise ValueError("Object key must not be empty")
+    if len(key.encode("utf-8")) > MAX_KEY_BYTES:
+        raise ValueError(f"Object key exceeds {MAX_KEY_BYTES} bytes")
+    return key
+
+
+def format_file_size(size_bytes):
+    # floor(log1024(size)) from the bit length, capped at the largest unit.
+    i = min(max(int(size_bytes).bit_length() - 1, 0) // 10, len(_UNITS) - 1)
+    return f"{size_bytes / (1 << i * 10):.2f} {_UNITS[i]}"
@@ -0,0 +1,127 @@
+import io
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import pytest
+
+from dependencies import get_s3_service
+from routers.endpoints import router
+
+
+@pytest.fixture
+def s3_service():
+    return MagicMock()
+
+
+@pytest.fixture
+def client(s3_service):
+    app = FastAPI()
+    app.include_router(router, prefix="/endpoint")
+    app.dependency_overrides[get_s3_service] = lambda: s3_service
+    return TestClient(app)
+
+
+def _not_modified(headers):
+    return ClientError(
+        {
+            "Error": {"Code": "304", "Message": "Not Modified"},
+            "ResponseMetadata": {"HTTPStatusCode": 304, "HTTPHeaders": headers},
+        },
+        "GetObject",
+    )
+
+
+def test_download_range_returns_partial_content(client, s3_service):
+    s3_service.download_stream.return_value = {
+        "Body": StreamingBody(io.BytesIO(b"ell"), 3),
+        "ContentLength": 3,
+        "ContentRange": "bytes 1-3/5",
+        "ContentType": "text/plain",
+        "ETag": '"etag"',
+        "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+
+    response = client.get(
+        "/endpoint/download",
+        params={"object_name": "key"},
+        headers={"Range": "bytes=1-3"},
+    )
+
+    assert response.status_code == 206
+    assert response.content == b"ell"
+    assert response.headers["content-range"] == "bytes 1-3/5"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == '"etag"'
+    assert s3_service.download_stream.call_args.kwargs["byte_range"] == (
+        "bytes=1-3"
+    )
+
+
+def test_download_not_modified_keeps_validators(client, s3_service):
+    s3_service.download_stream.side_effect = _not_modified({
+        "etag": '"etag"',
+        "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    })
+
+    response = client.get(
+        "/endpoint/download",
+        params={"object_name": "key"},
+        headers={"If-None-Match": '"etag"'},
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == '"etag"'
+    assert response.headers["last-modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_download_not_modified_falls_back_to_matched_etag(client, s3_service):
+    s3_service.download_stream.side_effect = _not_modified({})
+
+    response = client.get(
+        "/endpoint/download",
+        params={"object_name": "key"},
+        headers={"If-None-Match": '"etag"'},
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"etag"'
+
+
+@pytest.mark.parametrize(
+    ("path", "method"),
+    [
+        ("/endpoint/info", "get_file_info"),
+        ("/endpoint/exists", "file_exists"),
+    ],
+)
+def test_read_endpoints_normalize_keys_like_uploads(
+    client, s3_service, path, method
+):
+    getattr(s3_service, method).return_value = True
+
+    client.get(path, params={"object_name": "\\a\\\\b"})
+
+    getattr(s3_service, method).assert_called_once_with("a/b")
+
+
+def test_copy_normalizes_source_and_destination(client, s3_service):
+    response = client.post(
+        "/endpoint/copy",
+        json={"source_object_name": "/a//b", "dest_object_name": "c\\d"},
+    )
+
+    assert response.json()["object_name"] == "c/d"
+    s3_service.copy_file.assert_called_once_with("a/b", "c/d")
+
+
+def test_unusable_key_is_rejected(client, s3_service):
+    response = client.get("/endpoint/info", params={"object_name": "//"})
+
+    assert response.status_code == 400
+    s3_service.get_file_info.assert_not_called()
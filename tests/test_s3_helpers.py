@@ -0,0 +1,59 @@
+import pytest
+
+from utils.s3_helpers import MAX_KEY_BYTES, format_file_size, prepare_key
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("a/b.txt", "a/b.txt"),
+        ("/a/b", "a/b"),
+        ("///a//b", "a/b"),
+        ("a\\b\\c", "a/b/c"),
+        ("\\\\a\\\\b", "a/b"),
+        ("a\x00b\x1fc\x7f", "abc"),
+        # Removing a control character must not leave a doubled slash.
+        ("a/\x01/b", "a/b"),
+        ("a/\t\n/b", "a/b"),
+        ("\x01/a", "a"),
+        ("資料/報告 2024.pdf", "資料/報告 2024.pdf"),
+        ("a/b/", "a/b/"),
+    ],
+)
+def test_prepare_key_sanitizes(raw, expected):
+    assert prepare_key(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw",
+    ["", "/", "///", "\\", "\x01\x02", "/\x01/"],
+)
+def test_prepare_key_rejects_empty(raw):
+    with pytest.raises(ValueError, match="empty"):
+        prepare_key(raw)
+
+
+def test_prepare_key_length_limit_counts_utf8_bytes():
+    assert prepare_key("a" * MAX_KEY_BYTES) == "a" * MAX_KEY_BYTES
+    # Three bytes per character: under the limit in characters, over it in bytes.
+    with pytest.raises(ValueError, match="exceeds"):
+        prepare_key("資" * (MAX_KEY_BYTES // 3 + 1))
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (0, "0.00 B"),
+        (1, "1.00 B"),
+        (1023, "1023.00 B"),
+        (1024, "1.00 KB"),
+        (1536, "1.50 KB"),
+        (2**20 - 1, "1024.00 KB"),
+        (2**20, "1.00 MB"),
+        (5 * 2**30, "5.00 GB"),
+        (2**40, "1.00 TB"),
+        (2**50, "1024.00 TB"),
+    ],
+)
+def test_format_file_size(size, expected):
+    assert format_file_size(size) == expected
@@ -0,0 +1,265 @@
+import asyncio
+import io
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+
+import pytest
+
+from config import Settings
+from services.s3_service import (
+    S3Service,
+    _align_part_size,
+    _get_session,
+    close_s3_clients,
+)
+
+
+async def _chunks(count, size=4):
+    for _ in range(count):
+        yield b"x" * size
+
+
+@pytest.fixture(autouse=True)
+def aws_credentials(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    # Sessions and clients are shared per process; start each test fresh.
+    _get_session.cache_clear()
+    close_s3_clients()
+
+
+def _make_service(**overrides):
+    settings = Settings(
+        ak="ak", sk="sk", bucket_name="bucket", region_name="us-east-1",
+        **overrides,
+    )
+    return S3Service.from_settings(settings)
+
+
+@pytest.fixture
+def s3_service():
+    service = _make_service()
+    service.s3 = MagicMock()
+    service.s3.create_multipart_upload.return_value = {"UploadId": "upload"}
+    # One part per chunk, so a short stream still fills every uploader.
+    service.multipart_chunksize = 4
+    return service
+
+
+def test_upload_stream_fails_instead_of_hanging_when_uploaders_die(s3_service):
+    s3_service.s3.upload_part.side_effect = RuntimeError("boom")
+
+    async def upload():
+        return await asyncio.wait_for(
+            s3_service.upload_stream(_chunks(20), "key"), timeout=5
+        )
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(upload())
+    s3_service.s3.abort_multipart_upload.assert_called_once_with(
+        Bucket="bucket", Key="key", UploadId="upload"
+    )
+    s3_service.s3.complete_multipart_upload.assert_not_called()
+
+
+def test_delete_files_batches_by_1000_and_merges_results(s3_service):
+    def delete_objects(Bucket, Delete):
+        keys = [item["Key"] for item in Delete["Objects"]]
+        if keys[0] == "key2000":
+            raise ClientError(
+                {"Error": {"Code": "SlowDown", "Message": "Slow Down"}},
+                "DeleteObjects",
+            )
+        return {
+            "Deleted": [{"Key": key} for key in keys[1:]],
+            "Errors": [
+                {"Key": keys[0], "Code": "AccessDenied", "Message": "denied"}
+            ],
+        }
+
+    s3_service.s3.delete_objects.side_effect = delete_objects
+    results = s3_service.delete_files([f"key{i}" for i in range(2500)])
+
+    batch_sizes = sorted(
+        len(call.kwargs["Delete"]["Objects"])
+        for call in s3_service.s3.delete_objects.call_args_list
+    )
+    assert batch_sizes == [500, 1000, 1000]
+    assert sorted(results["deleted"]) == sorted(
+        f"key{i}" for i in [*range(1, 1000), *range(1001, 2000)]
+    )
+    errors = {error["object_name"]: error["code"] for error in results["errors"]}
+    assert errors.pop("key0") == "AccessDenied"
+    assert errors.pop("key1000") == "AccessDenied"
+    assert set(errors) == {f"key{i}" for i in range(2000, 2500)}
+    assert set(errors.values()) == {"RequestFailed"}
+
+
+def test_delete_files_without_keys_sends_nothing(s3_service):
+    assert s3_service.delete_files([]) == {"deleted": [], "errors": []}
+    s3_service.s3.delete_objects.assert_not_called()
+
+
+def test_upload_fileobj_async_queues_on_event_loop():
+    s3_service = _make_service(max_concurrent_uploads=1)
+    s3_service.s3 = MagicMock()
+    release = threading.Event()
+    s3_service.s3.upload_fileobj.side_effect = lambda *a, **kw: release.wait(5)
+
+    async def upload_twice():
+        uploads = [
+            asyncio.create_task(
+                s3_service.upload_fileobj_async(io.BytesIO(b"x"), f"key{i}")
+            )
+            for i in range(2)
+        ]
+        await asyncio.sleep(0.1)
+        # The second upload waits for a slot without entering a thread.
+        started = s3_service.s3.upload_fileobj.call_count
+        release.set()
+        return started, await asyncio.gather(*uploads)
+
+    started, results = asyncio.run(upload_twice())
+    assert started == 1
+    assert results == [True, True]
+
+
+def test_pool_covers_concurrent_transfer_fan_out():
+    s3_service = _make_service(
+        max_concurrent_uploads=10, transfer_max_concurrency=16
+    )
+    assert s3_service.s3.meta.config.max_pool_connections >= 10 * 16
+
+def test_max_retry_attempts_counts_the_first_call(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    s3_service = _make_service(max_retry_attempts=5)
+    attempts = []
+
+    def unavailable(request, **kwargs):
+        attempts.append(request)
+        return AWSResponse(request.url, 503, {}, MagicMock(content=b""))
+
+    s3_service.s3.meta.events.register("before-send.s3", unavailable)
+    with pytest.raises(ClientError):
+        s3_service.s3.head_bucket(Bucket="bucket")
+    assert len(attempts) == 5
+
+def test_copy_file_propagates_missing_source(s3_service):
+    s3_service.s3.copy.side_effect = ClientError(
+        {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+    )
+
+    with pytest.raises(ClientError):
+        s3_service.copy_file("missing", "dest")
+
+
+def _head_response():
+    return {
+        "ContentLength": 1,
+        "ContentType": "text/plain",
+        "ETag": '"etag"',
+        "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+def test_get_file_info_does_not_cache_result_invalidated_in_flight(s3_service):
+    def head_object(**kwargs):
+        # The object is deleted while this HEAD is still on the wire.
+        s3_service._invalidate_metadata("key")
+        return _head_response()
+
+    s3_service.s3.head_object.side_effect = head_object
+    s3_service.get_file_info("key")
+    s3_service.s3.head_object.side_effect = None
+    s3_service.s3.head_object.return_value = _head_response()
+
+    s3_service.get_file_info("key")
+    assert s3_service.s3.head_object.call_count == 2
+
+
+def test_download_stream_does_not_cache_result_invalidated_in_flight(
+    s3_service,
+):
+    def get_object(**kwargs):
+        s3_service._invalidate_metadata("key")
+        return _head_response()
+
+    s3_service.s3.get_object.side_effect = get_object
+    s3_service.download_stream("key")
+    s3_service.s3.head_object.return_value = _head_response()
+
+    s3_service.get_file_info("key")
+    s3_service.s3.head_object.assert_called_once()
+
+def test_get_file_info_caches_result(s3_service):
+    s3_service.s3.head_object.return_value = _head_response()
+
+    s3_service.get_file_info("key")
+    s3_service.get_file_info("key")
+    s3_service.s3.head_object.assert_called_once()
+
+
+def test_services_share_client_until_shutdown():
+    first = _make_service()
+    assert _make_service().s3 is first.s3
+
+    close_s3_clients()
+    assert _make_service().s3 is not first.s3
+
+def test_invalidation_survives_eviction_of_other_keys():
+    s3_service = _make_service(metadata_cache_max=1)
+    s3_service.s3 = MagicMock()
+
+    def head_object(**kwargs):
+        s3_service._invalidate_metadata("key")
+        # e.g. a large delete_files touching more keys than the cache holds.
+        for i in range(10):
+            s3_service._invalidate_metadata(f"other{i}")
+        return _head_response()
+
+    s3_service.s3.head_object.side_effect = head_object
+    s3_service.get_file_info("key")
+    s3_service.s3.head_object.side_effect = None
+    s3_service.s3.head_object.return_value = _head_response()
+
+    s3_service.get_file_info("key")
+    assert s3_service.s3.head_object.call_count == 2
+    assert s3_service._metadata_loads == {}
+
+
+MiB = 1024 * 1024
+
+
+@pytest.mark.parametrize(
+    ("chunk_size", "expected"),
+    [
+        (16 * MiB, 16 * MiB),
+        (32 * MiB, 32 * MiB),
+        (1, 16 * MiB),
+        (8 * MiB, 16 * MiB),
+        (16 * MiB + 1, 32 * MiB),
+        (40 * MiB, 48 * MiB),
+    ],
+)
+def test_align_part_size_rounds_up_to_16_mib(chunk_size, expected, caplog):
+    assert _align_part_size(chunk_size) == expected
+    rounded = [r for r in caplog.records if "rounded up" in r.getMessage()]
+    assert len(rounded) == (chunk_size != expected)
+
+
+def test_upload_stream_tolerates_missing_part_checksum(s3_service):
+    s3_service.checksum_algorithm = "CRC32"
+    s3_service.s3.upload_part.return_value = {"ETag": '"etag"'}
+
+    assert asyncio.run(s3_service.upload_stream(_chunks(2), "key")) is True
+    parts = s3_service.s3.complete_multipart_upload.call_args.kwargs[
+        "MultipartUpload"
+    ]["Parts"]
+    assert parts == [
+        {"ETag": '"etag"', "PartNumber": 1},
+        {"ETag": '"etag"', "PartNumber": 2},
+    ]